@@ -4,7 +4,7 @@ import subprocess
 import time
 
 from .node import Node
-from .utils import flags_from_dict, check_file
+from .utils import flags_from_dict, check_file, poll_pool, spawn
 
 
 # Seq is a wrapper type around int for supplying numerical parameters
@@ -45,15 +45,28 @@ class Chain:
         cmd += flags_from_dict(kwargs)
 
         chainspec = op.join(self.path, 'chainspec.json')
-        with open(chainspec, 'w', encoding='utf-8') as f:
-            subprocess.run(cmd, stdout=f, check=True)
-
-        for nv in nonvalidators:
-            cmd = [check_file(binary),
-                   'bootstrap-node',
-                   '--base-path', self.path,
-                   '--account-id', nv]
-            subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True)
+        # bootstrap-chain and all bootstrap-node calls write to separate directories, so they
+        # are launched all at once and only then awaited.
+        procs = []
+        try:
+            with open(chainspec, 'w', encoding='utf-8') as f:
+                procs.append(spawn(cmd, wait=False, stdout=f))
+            for nv in nonvalidators:
+                procs.append(spawn([binary,
+                                    'bootstrap-node',
+                                    '--base-path', self.path,
+                                    '--account-id', nv],
+                                   wait=False, stdout=subprocess.DEVNULL))
+            for p in procs:
+                p.wait()
+        finally:
+            for p in procs:
+                if p.poll() is None:
+                    p.kill()
+                    p.wait()
+        for p in procs:
+            if p.returncode != 0:
+                raise subprocess.CalledProcessError(p.returncode, p.args)
 
         new_node = lambda x: Node(binary, chainspec, op.join(self.path, x), self.path)
         self.validator_nodes = [new_node(a) for a in validators]
@@ -61,6 +74,12 @@ class Chain:
 
         self.nodes = self.validator_nodes + self.nonvalidator_nodes
 
+    @staticmethod
+    def _parallel(fn, items):
+        """Call `fn` on every element of `items` concurrently and return the list of results.
+        Exceptions raised by `fn` are propagated."""
+        return list(poll_pool().map(fn, items))
+
     @staticmethod
     def _set_flags(nodes, *args, **kwargs):
         for k in args:
@@ -108,6 +127,11 @@ class Chain:
         Providing a list of values results in each node being assigned a corresponding value from the list."""
         Chain._set_flags(self.nonvalidator_nodes, *args, **kwargs)
 
+    def addresses(self):
+        """Return the public addresses of all nodes, see `Node.address()`.
+        Nodes' p2p keys are inspected concurrently."""
+        return self._parallel(Node.address, self.nodes)
+
     def set_binary(self, binary, nodes=None):
         """Replace nodes' binary with `binary`. Optional `nodes` argument can be used to specify
         which nodes are affected and should be a list of integer indices (0..N-1).
@@ -132,43 +156,64 @@ class Chain:
         Optional `nodes` argument can be used to specify which nodes are affected and should be
         a list of integer indices (0..N-1). Affects all nodes if omitted."""
         idx = nodes or range(len(self.nodes))
-        for i in idx:
-            self.nodes[i].set_log_level(target, level)
+        Chain._parallel(lambda i: self.nodes[i].set_log_level(target, level), idx)
 
     def start(self, name, nodes=None, backup=True):
         """Start the chain. `name` will be used to name logfiles: name0.log, name1.log etc.
         Optional `nodes` argument can be used to specify which nodes are affected and should be
         a list of integer indices (0..N-1). Affects all nodes if omitted."""
         idx = nodes or range(len(self.nodes))
-        for i in idx:
-            self.nodes[i].start(name + str(i), backup)
+        Chain._parallel(lambda i: self.nodes[i].start(name + str(i), backup), idx)
 
-    def stop(self, nodes=None):
+    def stop(self, nodes=None, timeout=None):
         """Stop the chain. Optional `nodes` argument can be used to specify which nodes are affected
-        and should be a list of integer indices (0..N-1). Affects all nodes if omitted."""
+        and should be a list of integer indices (0..N-1). Affects all nodes if omitted.
+        Nodes are killed with SIGKILL, unless `timeout` is given - see `Node.stop()`."""
         idx = nodes or range(len(self.nodes))
-        for i in idx:
-            self.nodes[i].stop()
+        Chain._parallel(lambda i: self.nodes[i].stop(timeout), idx)
+
+    def pause(self, nodes=None):
+        """Freeze the chosen nodes without killing them, e.g. to simulate a network partition.
+        Optional `nodes` argument can be used to specify which nodes are affected and should be
+        a list of integer indices (0..N-1). Affects all nodes if omitted."""
+        idx = nodes or range(len(self.nodes))
+        Chain._parallel(lambda i: self.nodes[i].pause(), idx)
+
+    def resume(self, nodes=None):
+        """Resume the nodes frozen with `pause()`. Optional `nodes` argument can be used to specify
+        which nodes are affected and should be a list of integer indices (0..N-1).
+        Affects all nodes if omitted."""
+        idx = nodes or range(len(self.nodes))
+        Chain._parallel(lambda i: self.nodes[i].resume(), idx)
 
     def purge(self, nodes=None):
         """Delete the database of the chosen nodes. Optional `nodes` argument can be used to specify
          which nodes are affected and should be a list of integer indices (0..N-1).
          Affects all nodes if omitted."""
         idx = nodes or range(len(self.nodes))
-        for i in idx:
-            self.nodes[i].purge()
+        Chain._parallel(lambda i: self.nodes[i].purge(), idx)
 
     def fork(self, forkoff_path, ws_endpoint):
         """Replace the chainspec of this chain with the state forked from the given `ws_endpoint`.
         This method should be run after bootstrapping the chain, but before starting it.
         'forkoff_path' should be a path to fork-off binary."""
-        forked = op.join(self.path, 'forked.json')
+        self.fork_finish(self.fork_async(forkoff_path, ws_endpoint))
+
+    def fork_async(self, forkoff_path, ws_endpoint):
+        """Same as `fork()`, but only launches fork-off in the background and returns its process.
+        The result must be passed to `fork_finish()`. Useful for preparing several chains at once."""
         cmd = [check_file(forkoff_path), '--ws-rpc-endpoint', ws_endpoint,
                 '--initial-spec-path', op.join(self.path, 'chainspec.json'),
                 '--snapshot-path', op.join(self.path, 'snapshot.json'),
-                '--combined-spec-path', forked]
-        subprocess.run(cmd, check=True)
-        self.set_chainspec(forked)
+                '--combined-spec-path', op.join(self.path, 'forked.json')]
+        return spawn(cmd, wait=False)
+
+    def fork_finish(self, process):
+        """Wait for the fork-off `process` returned by `fork_async()` and switch all nodes
+        to the forked chainspec. Raise CalledProcessError if fork-off failed."""
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+        self.set_chainspec(op.join(self.path, 'forked.json'))
 
     def update_runtime(self, cliain_path, sudo_phrase, runtime):
         """Send set_code extrinsic with runtime update.
@@ -176,38 +221,37 @@ class Chain:
         port = self.nodes[0].ws_port()
         cmd = [check_file(cliain_path), '--node', f'localhost:{port}', '--seed', sudo_phrase,
                 'update-runtime', '--runtime', check_file(runtime)]
-        subprocess.run(cmd, check=True)
+        spawn(cmd, check=True)
 
-    def wait_for_finalization(self, old_finalized, nodes=None, timeout=300, finalized_delta=3, catchup=True, catchup_delta=10):
+    def wait_for_finalization(self, old_finalized, nodes=None, timeout=300, finalized_delta=3, catchup=True, catchup_delta=10, interval=1):
         """Wait for finalization to catch up with the newest blocks. Requires providing the number
         of the last finalized block, which will be used as a reference against recently finalized blocks.
         The finalization is considered "recovered" when all provided `nodes` (all nodes if None)
         have seen a finalized block higher than `old_finalized` + `finalized_delta`.
         If `catchup` is True, wait until finalization catches up with the newly produced blocks
         (within `catchup_delta` blocks). 'timeout' (in seconds) is a global timeout for the whole method
-        to execute. Raise TimeoutError if finalization fails to recover within the given timeout."""
+        to execute. Raise TimeoutError if finalization fails to recover within the given timeout.
+        Nodes' logs are checked every `interval` seconds."""
         nodes = [self.nodes[i] for i in nodes] if nodes else self.nodes
         deadline = time.time() + timeout
-        while any((n.highest_block()[1] <= old_finalized + finalized_delta) for n in nodes):
-            time.sleep(5)
+        while any(f <= old_finalized + finalized_delta for _, f in self._parallel(Node.highest_block, nodes)):
+            time.sleep(interval)
             if time.time() > deadline:
                 raise TimeoutError(f'Block finalization stalled after {timeout} seconds')
         if catchup:
-            def lags(node):
-                r, f = node.highest_block()
-                return r - f > catchup_delta
-            while any(lags(n) for n in nodes):
-                time.sleep(5)
+            while any(r - f > catchup_delta for r, f in self._parallel(Node.highest_block, nodes)):
+                time.sleep(interval)
                 if time.time() > deadline:
                     print(f'Finalization restored, but failed to catch up with recent blocks within {timeout} seconds')
                     break
 
-    def wait_for_authorities(self, nodes=None, timeout=300):
+    def wait_for_authorities(self, nodes=None, timeout=300, interval=1):
         """Wait for the selected `nodes` (all validator nodes if None) to connect to all known authorities.
-        If not successful within the given `timeout` (in seconds), raise TimeoutError."""
+        If not successful within the given `timeout` (in seconds), raise TimeoutError.
+        Nodes' logs are checked every `interval` seconds."""
         nodes = [self.nodes[i] for i in nodes] if nodes else self.validator_nodes
         deadline = time.time() + timeout
-        while not all(n.check_authorities() for n in nodes):
-            time.sleep(5)
+        while not all(self._parallel(Node.check_authorities, nodes)):
+            time.sleep(interval)
             if time.time() > deadline:
                 raise TimeoutError(f'Failed to connect to all authorities after {timeout} seconds')
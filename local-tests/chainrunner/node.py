@@ -1,12 +1,44 @@
+# `jsonrpcclient` and `requests` are imported where they are used, so scripts that
+# never talk to a node over RPC don't pay for importing them.
 import json
-import jsonrpcclient
+import mmap
+import os
 import os.path as op
 import re
-import requests
+import signal
 import subprocess
+from collections import OrderedDict
 
 
-from .utils import flags_from_dict
+from .utils import flags_from_dict, spawn
+
+_AUTH_RE = re.compile(rb'(\d+)/(\d+) authorities known for session')
+_DIGITS = b'0123456789'
+# Number of patterns `Node.greplog` keeps incremental results for.
+_GREP_CACHE_SIZE = 32
+
+
+def _parse_best(line):
+    """Parse the best and finalized block numbers from a line of the form
+    `... best: #<best> (<hash>), finalized #<finalized> (<hash>) ...`.
+    Plain string scanning is used, as this is done every time a node is polled."""
+    i = line.find(b'best: #') + 7
+    j = line.find(b' ', i)
+    k = line.find(b'finalized #', j) + 11
+    if j < 0 or k < 11:
+        return None
+    best = line[i:j]
+    finalized = line[k:]
+    finalized = finalized[:len(finalized) - len(finalized.lstrip(_DIGITS))]
+    if best.isdigit() and finalized:
+        return best, finalized
+    return None
+
+
+def _parse_authorities(line):
+    """Parse the number of known and all authorities from a line logged by the validator network."""
+    match = _AUTH_RE.search(line)
+    return match.groups() if match else None
 
 
 class Node:
@@ -15,6 +47,9 @@ class Node:
     `chainspec` should be a path to a file with chainspec,
     `path` should point to a folder where the node's base path is."""
 
+    # Lines tracked by `_tail`: a literal present in every such line and a function parsing it.
+    _TAIL_PATTERNS = ((b'best: #', _parse_best), (b' authorities known for session', _parse_authorities))
+
     def __init__(self, binary, chainspec, path, logdir=None):
         self.chainspec = chainspec
         self.binary = binary
@@ -24,6 +59,15 @@ class Node:
         self.process = None
         self.flags = {}
         self.running = False
+        self._log_key = None
+        self._log_pos = 0
+        self._log_last = {}
+        self._log_stat = None
+        self._grep_cache = OrderedDict()
+        self._rpc_url = None
+        self._peer_id = None
+        # Keep-alive connection reused by all RPCs sent to this node, created by the first RPC.
+        self._session = None
 
     def _stdargs(self):
         return ['--base-path', self.path, '--chain', self.chainspec]
@@ -39,20 +83,49 @@ class Node:
         cmd = [self.binary, '--name', name] + self._stdargs() + self._nodeargs(backup) + flags_from_dict(self.flags)
 
         self.logfile = op.join(self.logdir, name + '.log')
+        self._log_key = None
+        self._log_stat = None
+        self._grep_cache = OrderedDict()
+        self._rpc_url = None
         with open(self.logfile, 'w', encoding='utf-8') as logfile:
-            self.process = subprocess.Popen(cmd, stderr=logfile, stdout=subprocess.DEVNULL)
+            self.process = spawn(cmd, wait=False, stderr=logfile, stdout=subprocess.DEVNULL)
         self.running = True
 
-    def stop(self):
-        """Stop the node by sending SIGKILL."""
+    def stop(self, timeout=None):
+        """Stop the node by sending SIGKILL.
+        If `timeout` (in seconds) is given, send SIGTERM first so the node can close its database
+        cleanly (making the next start faster) and resort to SIGKILL only if it doesn't exit in time."""
         if self.running:
+            if timeout is not None:
+                self.process.terminate()
+                # A paused node would not handle SIGTERM until resumed.
+                self.process.send_signal(signal.SIGCONT)
+                try:
+                    self.process.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    pass
             self.process.kill()
+            self.process.wait()
             self.running = False
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def pause(self):
+        """Freeze the node by sending SIGSTOP. The process keeps its state and can be brought
+        back with `resume()`, which avoids the startup cost of `stop()` followed by `start()`."""
+        if self.running:
+            self.process.send_signal(signal.SIGSTOP)
+
+    def resume(self):
+        """Resume the node frozen with `pause()` by sending SIGCONT."""
+        if self.running:
+            self.process.send_signal(signal.SIGCONT)
 
     def purge(self):
         """Purge chain (delete the database of the node)."""
         cmd = [self.binary, 'purge-chain', '-y'] + self._stdargs()
-        subprocess.run(cmd, stdout=subprocess.DEVNULL)
+        spawn(cmd, stdout=subprocess.DEVNULL)
 
     def rpc_port(self):
         """Return RPC port for this node. The value is taken from `flags` dictionary.
@@ -71,27 +144,89 @@ class Node:
         return port
 
     def greplog(self, regexp):
-        """Find in the logs all occurrences of the given regexp. Returns a list of matches."""
+        """Find in the logs all occurrences of the given regexp. Returns a list of matches.
+        `regexp` can be a str or bytes pattern, possibly compiled. Bytes patterns are matched
+        against the raw log, skipping the UTF-8 decoding, and return bytes.
+        Matches are remembered for the most recently used patterns, so repeated calls only scan
+        the lines appended since the previous call. Because of that, a match must not span multiple lines."""
         if not self.logfile:
             return []
-        with open(self.logfile, encoding='utf-8') as f:
-            log = f.read()
-        return re.findall(regexp, log)
+        with open(self.logfile, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            key = (self.logfile, stat.st_ino)
+            prev_key, pos, matches = self._grep_cache.pop(regexp, (None, 0, []))
+            if prev_key != key or stat.st_size < pos:
+                pos, matches = 0, []
+            f.seek(pos)
+            log = f.read(stat.st_size - pos)
+        # While the node is running, scan only complete lines, a partially written one is picked up
+        # by the next call. The log of a stopped node is final, including a last line without newline.
+        if self.running:
+            log = log[:log.rfind(b'\n') + 1]
+        end = pos + len(log)
+        if isinstance(getattr(regexp, 'pattern', regexp), str):
+            log = log.decode('utf-8', errors='replace')
+        new = re.findall(regexp, log)
+        # The offset is advanced only once the new part has been searched successfully.
+        matches.extend(new)
+        self._grep_cache[regexp] = (key, end, matches)
+        if len(self._grep_cache) > _GREP_CACHE_SIZE:
+            self._grep_cache.popitem(last=False)
+        return list(matches)
+
+    def _tail(self):
+        """Scan the part of the log appended since the previous call and record, for each of
+        `_TAIL_PATTERNS`, the result of parsing its most recent line in `_log_last`.
+        The new part is searched backwards from the end for the literal and only the line
+        containing it is parsed, so the cost of polling doesn't grow with the log size."""
+        if not self.logfile:
+            return
+        stat = os.stat(self.logfile)
+        # Nothing was written since the previous call, so `_log_last` is up to date.
+        if (stat.st_ino, stat.st_mtime_ns, stat.st_size) == self._log_stat:
+            return
+        self._log_stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with open(self.logfile, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            key = (self.logfile, stat.st_ino)
+            if key != self._log_key or stat.st_size < self._log_pos:
+                self._log_key, self._log_pos, self._log_last = key, 0, {}
+            if stat.st_size == self._log_pos:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Scan only complete lines, a partially written one is picked up by the next call.
+                pos, end = self._log_pos, mm.rfind(b'\n', self._log_pos) + 1
+                if end == 0:
+                    return
+                for literal, parse in Node._TAIL_PATTERNS:
+                    stop = end
+                    while True:
+                        i = mm.rfind(literal, pos, stop)
+                        if i < 0:
+                            break
+                        stop = mm.rfind(b'\n', pos, i) + 1 or pos
+                        parsed = parse(mm[stop:mm.find(b'\n', i)])
+                        if parsed:
+                            self._log_last[parse] = parsed
+                            break
+                self._log_pos = end
 
     def highest_block(self):
         """Find in the logs the height of the most recent block.
         Return two ints: highest block and highest finalized block."""
-        results = self.greplog(r'best: #(\d+) .+ finalized #(\d+)')
-        if results:
-            a, b = results[-1]
-            return int(a), int(b)
+        self._tail()
+        groups = self._log_last.get(_parse_best)
+        if groups:
+            best, finalized = groups
+            return int(best), int(finalized)
         return -1, -1
 
     def check_authorities(self):
         """Find in the logs the number of authorities this node is connected to.
         Return bool indicating if it's connected to all known authorities."""
-        grep = self.greplog(r'(\d+)/(\d+) authorities known for session')
-        return grep[-1][0] == grep[-1][1] if grep else False
+        self._tail()
+        groups = self._log_last.get(_parse_authorities)
+        return groups[0] == groups[1] if groups else False
 
     def get_hash(self, height):
         """Find the hash of the block with the given height. Requires the node to be running."""
@@ -107,18 +242,48 @@ class Node:
         cmd = [self.binary, 'export-state'] + self._stdargs()
         if block is not None:
             cmd.append(str(block))
-        proc = subprocess.run(cmd, capture_output=True, check=True)
+        proc = spawn(cmd, capture_output=True, check=True)
         return json.loads(proc.stdout)
 
-    def rpc(self, method, params=None):
+    def _post(self, payload, timeout):
+        """Send JSON `payload` to the node's RPC endpoint and return the decoded JSON response."""
+        import requests
+        if self._session is None:
+            self._session = requests.Session()
+            self._session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        if self._rpc_url is None:
+            self._rpc_url = f'http://localhost:{self.rpc_port()}/'
+        return self._session.post(self._rpc_url, json=payload, timeout=timeout).json()
+
+    def rpc(self, method, params=None, timeout=10):
         """Make an RPC call to the node with the given method and params.
-        `params` should be a tuple for positional arguments, or a dict for keyword arguments."""
+        `params` should be a tuple for positional arguments, or a dict for keyword arguments.
+        Raise requests.Timeout if the node doesn't respond within `timeout` seconds."""
+        if not self.running:
+            print("cannot RPC because node is not running")
+            return None
+        import jsonrpcclient
+        return jsonrpcclient.parse(self._post(jsonrpcclient.request(method, params), timeout))
+
+    def rpc_batch(self, calls, timeout=10):
+        """Make several RPC calls to the node in a single HTTP request (JSON-RPC batch).
+        `calls` should be a list of (method, params) pairs, with `params` as in `rpc()`.
+        Return the list of responses in the order of `calls`.
+        Raise RuntimeError if the node rejects the batch as a whole."""
         if not self.running:
             print("cannot RPC because node is not running")
             return None
-        port = self.rpc_port()
-        resp = requests.post(f'http://localhost:{port}/', json=jsonrpcclient.request(method, params))
-        return jsonrpcclient.parse(resp.json())
+        import jsonrpcclient
+        batch = [jsonrpcclient.request(method, params, id=i) for i, (method, params) in enumerate(calls)]
+        reply = self._post(batch, timeout)
+        # A malformed batch is answered with a single error object instead of a list.
+        if not isinstance(reply, list):
+            raise RuntimeError(f'batch RPC rejected by the node: {reply}')
+        responses = {r.id: r for r in jsonrpcclient.parse(reply)}
+        missing = [calls[i][0] for i in range(len(calls)) if i not in responses]
+        if missing:
+            raise RuntimeError(f'no response to batch RPC calls: {missing}')
+        return [responses[i] for i in range(len(calls))]
 
     def set_log_level(self, target, level):
         """Change log verbosity of the chosen target.
@@ -135,6 +300,8 @@ class Node:
                 port = self.flags['port']
             else:
                 return None
-        cmd = [self.binary, 'key', 'inspect-node-key', '--file', op.join(self.path, 'p2p_secret')]
-        output = subprocess.check_output(cmd).decode().strip()
-        return f'/dns4/localhost/tcp/{port}/p2p/{output}'
+        if self._peer_id is None:
+            # The p2p key never changes after bootstrapping, so it's inspected only once.
+            cmd = [self.binary, 'key', 'inspect-node-key', '--file', op.join(self.path, 'p2p_secret')]
+            self._peer_id = spawn(cmd, stdout=subprocess.PIPE, check=True).stdout.decode().strip()
+        return f'/dns4/localhost/tcp/{port}/p2p/{self._peer_id}'
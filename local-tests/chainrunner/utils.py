@@ -1,24 +1,48 @@
-import jsonrpcclient
 import os.path as op
 import re
 import subprocess
-from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+_SS58_RE = re.compile(rb'SS58 Address:\s*(\w+)$', re.MULTILINE)
+_POLL_POOL = None
+
+
+def poll_pool():
+    """Return the thread pool shared by all helpers running node operations concurrently,
+    creating it on first use."""
+    global _POLL_POOL
+    if _POLL_POOL is None:
+        _POLL_POOL = ThreadPoolExecutor(max_workers=16)
+    return _POLL_POOL
+
+
+def spawn(cmd, wait=True, **kwargs):
+    """Run `cmd` like `subprocess.run` and return the CompletedProcess, or only start it and
+    return the Popen if `wait` is False. Other keyword arguments are passed to subprocess.
+    `close_fds` is False, which lets subprocess start the binary with posix_spawn instead of
+    forking this process. Descriptors opened by Python are non-inheritable, so they don't leak,
+    but inheritable descriptors this process got from its parent are passed through to the child."""
+    if wait:
+        return subprocess.run(cmd, close_fds=False, **kwargs)
+    return subprocess.Popen(cmd, close_fds=False, **kwargs)
 
 
 def generate_keys(binary, phrases):
     """Generate public keys based on the list of seed phrases.
     `binary` should be a path to some `aleph-node` binary. `phrases` should be a list of strings.
-    Returns an ordered dictionary with phrases as keys and corresponding public keys as values.
+    Returns a dictionary with phrases as keys and corresponding public keys as values.
     The order follows the order in `phrases`.
     """
     check_file(binary)
-    regexp = re.compile(r'SS58 Address:\s*(\w+)$', re.MULTILINE)
-    res = OrderedDict()
-    for p in phrases:
-        out = subprocess.check_output([binary, 'key', 'inspect', p]).decode()
-        matches = regexp.findall(out)
-        res[p] = matches[0] if matches else None
-    return res
+    phrases = list(phrases)
+
+    def inspect(phrase):
+        output = spawn([binary, 'key', 'inspect', phrase], stdout=subprocess.PIPE, check=True).stdout
+        match = _SS58_RE.search(output)
+        return match[1].decode() if match else None
+
+    # Each inspection is a separate run of the binary, so they are done concurrently.
+    return dict(zip(phrases, poll_pool().map(inspect, phrases)))
 
 
 def check_file(path):
@@ -45,7 +69,7 @@ def flags_from_dict(d):
 
 def check_finalized(nodes):
     """Check nodes stats, print them and return finalized block number per node"""
-    results = [node.highest_block() for node in nodes]
+    results = list(poll_pool().map(lambda node: node.highest_block(), nodes))
     highest, finalized = zip(*results)
     print('Blocks seen by nodes:')
     print('  Highest:   ', *highest)
@@ -59,10 +83,12 @@ def check_version(nodes, verbose=False):
     Print the summary to the standard output and return the runtime version.
     If multiple runtime versions are reported, print error and return the maximum.
     If `verbose` is True, print the whole RPC response."""
+    import jsonrpcclient
     versions = set()
-    for i, node in enumerate(nodes):
-        sysver = node.rpc('system_version').result
-        resp = node.rpc('state_getRuntimeVersion')
+    # Both queries go to each node in a single JSON-RPC batch request.
+    query = lambda node: node.rpc_batch([('system_version', None), ('state_getRuntimeVersion', None)])
+    for i, (sysver, resp) in enumerate(poll_pool().map(query, nodes)):
+        sysver = sysver.result
         if verbose:
             print(resp)
         if isinstance(resp, jsonrpcclient.Ok):
@@ -37,7 +37,7 @@ chain.set_flags('validator',
                 rpc_cors='all',
                 rpc_methods='Unsafe',
                 pruning='archive')
-addresses = [n.address() for n in chain]
+addresses = chain.addresses()
 chain.set_flags(bootnodes=addresses[0], public_addr=addresses)
 
 print('Starting the chain')
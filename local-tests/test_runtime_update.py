@@ -1,5 +1,6 @@
 #!/bin/env python
 import argparse
+import binascii
 import json
 import logging
 import os
@@ -14,6 +15,8 @@ logging.basicConfig(
 )
 
 WORKDIR = os.path.abspath(os.getenv('WORKDIR', '/tmp'))
+# Placeholder for the runtime code, replaced by the hex-encoded runtime when the chainspec is written.
+CODE_PLACEHOLDER = '@@CODE@@'
 
 
 def file(filepath: str) -> Path:
@@ -42,14 +45,17 @@ def save_runtime_to_chainspec(chainspec_path: Path, new_chainspec_path: Path, ru
         chainspec = json.loads(chainspec_file.read())
     logging.debug(f'✅ Read chainspec from {chainspec_path}')
 
-    with open(runtime_path, mode='rb') as runtime_file:
-        runtime = runtime_file.read().hex()
-    logging.debug(f'✅ Read runtime from {runtime_path}')
-
-    chainspec['genesis']['raw']['top']['0x3a636f6465'] = f'0x{runtime}'
-
-    with open(new_chainspec_path, mode='w', encoding='utf-8') as chainspec_file:
-        chainspec_file.write(json.dumps(chainspec, indent=2))
+    chainspec['genesis']['raw']['top']['0x3a636f6465'] = CODE_PLACEHOLDER
+    prefix, suffix = json.dumps(chainspec, separators=(',', ':')).split(json.dumps(CODE_PLACEHOLDER), 1)
+
+    # The runtime is hex-encoded in chunks straight into the output file,
+    # so the whole hex string is never held in memory nor escaped by `json`.
+    with open(runtime_path, mode='rb') as runtime_file, \
+            open(new_chainspec_path, mode='w', encoding='utf-8') as chainspec_file:
+        chainspec_file.write(prefix + '"0x')
+        for chunk in iter(lambda: runtime_file.read(1 << 20), b''):
+            chainspec_file.write(binascii.hexlify(chunk).decode('ascii'))
+        chainspec_file.write('"' + suffix)
     logging.info(f'✅ Saved updated chainspec to {new_chainspec_path}')
 
 